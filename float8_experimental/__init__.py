@@ -4,7 +4,7 @@
 # This source code is licensed under the BSD 3-Clause license found in the
 # LICENSE file in the root directory of this source tree.
 # Lets define a few top level things here
-from float8_experimental.float8_linear import Float8Linear, Float8DASWLinear, Float8DASWLinear2, Float8SWLinear
+from float8_experimental.float8_linear import Float8Linear, Float8DASWLinear, Float8DASWLinear2, Float8RowwiseSWLinear, Float8SWLinear
 from float8_experimental.float8_tensor import Float8Tensor
 
-__all__ = ["Float8Tensor", "Float8Linear", "Float8DASWLinear", "Float8DASWLinear2", "Float8SWLinear"]
+__all__ = ["Float8Tensor", "Float8Linear", "Float8DASWLinear", "Float8DASWLinear2", "Float8RowwiseSWLinear", "Float8SWLinear"]
@@ -15,6 +15,18 @@ enable_amax_init = True
 # option is useful for safety, but not strictly necessary.
 enable_pre_and_post_forward = True
 
+# If True, Float8Linear wraps its core cast -> matmul -> cast sequence in a
+# single torch.compile'd region so inductor can fuse the amax/scale update,
+# the fp8 casts and the bias add around the scaled_mm. The pre/post forward
+# bookkeeping (which graph-breaks) stays outside of the compiled region.
+# Leave this off when compiling the whole model with torch.compile.
+compile_inner = False
+
+# If > 0, fp8 matmuls with M <= this threshold are dispatched to the
+# autotuned Triton fp8 GEMM instead of torch._scaled_mm; the cuBLAS/CUTLASS
+# kernels are slow for small (decode-style) M. 0 disables the Triton path.
+triton_gemm_m_threshold = 0
+
 # If True, then uses a tensor subclass for the fp8 linear module's weight that
 # implements pre/post-all-gather methods to do fp8 all-gather with FSDP2.
 # Only dynamic scaling is supported for now.
@@ -61,10 +61,15 @@ class Float8DynamicLinear(torch.nn.Linear):
 
     def __init__(self, **super_kwargs):
         super().__init__(**super_kwargs)
+        # Set by from_float: only the fp8 all-gather path can hand us a
+        # weight that is already a Float8Tensor, so the common case skips
+        # the per-forward isinstance check
+        self._weight_pre_cast = False
 
     def forward(self, x):
         x_fp8 = cast_to_float8_e4m3fn(x, self.forward_config)
-        if isinstance(self.weight, Float8Tensor):  # cast by FSDP
+        if self._weight_pre_cast and type(self.weight) is Float8Tensor:
+            # cast by FSDP
             w_fp8 = self.weight
         else:
             w_fp8 = cast_to_float8_e4m3fn(self.weight, self.forward_config)
@@ -94,6 +99,7 @@ class Float8DynamicLinear(torch.nn.Linear):
             new_mod.weight = nn.Parameter(
                 WeightWithDynamicFloat8CastTensor(mod.weight, new_mod.forward_config)
             )
+            new_mod._weight_pre_cast = True
         else:
             new_mod.weight = mod.weight
         new_mod.bias = mod.bias
@@ -114,6 +120,9 @@ def cast_to_float8_e4m3fn(
 def cast_to_float8_e5m2_bw(
     gradY: torch.Tensor, mm_config: ScaledMMConfig
 ) -> torch.Tensor:
+    if not torch.is_grad_enabled():
+        # no backward will run, skip the autograd.Function wrapping
+        return gradY
     return NoopFwToFloat8E5M2Bw.apply(gradY, mm_config)
 
 
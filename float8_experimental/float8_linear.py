@@ -13,12 +13,14 @@ owners to implement their own UEX.
 """
 
 import dataclasses
+import functools
 
 from typing import Optional
 
 import float8_experimental.config as config
 
 import torch
+import torch.distributed as dist
 
 from float8_experimental.float8_tensor import (
     Float8Tensor,
@@ -26,7 +28,11 @@ from float8_experimental.float8_tensor import (
     to_fp8_no_autograd,
 )
 
-from float8_experimental.float8_utils import amax_history_to_scale, tensor_to_amax
+from float8_experimental.float8_utils import (
+    amax_history_to_scale,
+    amax_to_scale,
+    tensor_to_amax,
+)
 
 HAS_TRITON_FP8_MATMUL = False
 try:
@@ -35,6 +41,30 @@ try:
 except:
     pass
 
+HAS_FUSED_ACT_QUANT = False
+try:
+    from float8_experimental.fused_quant import (
+        fused_act_quantize_fp8,
+        fused_init_amaxes_scales,
+        fused_quantize_transpose_fp8,
+        fused_rowwise_quantize_fp8,
+    )
+    HAS_FUSED_ACT_QUANT = True
+except:
+    pass
+
+# Bound once at import so the per-forward autocast checks skip the
+# torch-module attribute chain
+_is_autocast_enabled = torch.is_autocast_enabled
+_get_autocast_gpu_dtype = torch.get_autocast_gpu_dtype
+
+# Eager fallbacks for the ops supported by the fused act+quant kernel; the
+# kernel's gelu is the tanh approximation, so the fallback must match it
+_EAGER_ACTIVATIONS = {
+    "relu": torch.nn.functional.relu,
+    "gelu": functools.partial(torch.nn.functional.gelu, approximate="tanh"),
+}
+
 HAS_VLLM_CUTLASS_SCALED_MM = False
 try:
     from vllm._custom_ops import cutlass_scaled_mm
@@ -53,23 +83,55 @@ def _maybe_initialize_amaxes_scales_for_float8_cast(
     scale_fn_name,
     float8_dtype,
     is_initialized,
+    new_amax=None,
 ):
     """
     If x is about to be cast to `float8` and the amax buffers are not initialized,
     initializes them inplace.
+
+    If `new_amax` is provided it is assumed to already be reduced across
+    ranks (see the batched all_reduce in `Float8Linear._core_forward`) and
+    the local reduction over x is skipped.
     """
     if is_initialized:
         return
+    if (
+        new_amax is None
+        and HAS_FUSED_ACT_QUANT
+        and x.is_cuda
+        and type(x) in (torch.Tensor, torch.nn.Parameter)
+        and scale_fn_name == "max"
+    ):
+        # Single pass over x + one tiny finalize kernel instead of a
+        # reduction, two copies and a history scan
+        with torch.no_grad():
+            fused_init_amaxes_scales(
+                x, cur_amax, amax_history, scale, float8_dtype, x.dtype
+            )
+        return
     with torch.no_grad():
         # Note: we need to enable distributed reduction here in order
         # to match numerics between single GPU and multi GPU code
-        new_amax = tensor_to_amax(x, reduce_amax=True)
-        cur_amax.fill_(new_amax)
-        amax_history[0] = new_amax
-        new_scale = amax_history_to_scale(
-            amax_history, float8_dtype, x.dtype, scale_fn_name
-        )
-        scale.copy_(new_scale)
+        if new_amax is None:
+            new_amax = tensor_to_amax(x, reduce_amax=True)
+        if scale_fn_name == "max":
+            # On the first iteration the history holds a single non-zero
+            # entry (new_amax), so scanning it is equivalent to converting
+            # new_amax directly and saves the history-reduction kernel
+            new_scale = amax_to_scale(new_amax, float8_dtype, x.dtype)
+            new_amax = new_amax.reshape(1)
+            # one batched dispatch instead of three 1-element copies
+            torch._foreach_copy_(
+                [cur_amax, amax_history.narrow(0, 0, 1), scale],
+                [new_amax, new_amax, new_scale.reshape(1)],
+            )
+        else:
+            cur_amax.fill_(new_amax)
+            amax_history[0] = new_amax
+            new_scale = amax_history_to_scale(
+                amax_history, float8_dtype, x.dtype, scale_fn_name
+            )
+            scale.copy_(new_scale)
 
 
 @torch._dynamo.allow_in_graph
@@ -112,11 +174,38 @@ class NoopFwToFloat8E5M2Bw(torch.autograd.Function):
             is_amax_initialized,
         )
 
-        fp8_amax_dL_dY.fill_(tensor_to_amax(go))
+        if (
+            HAS_FUSED_ACT_QUANT
+            and go.is_cuda
+            and type(go) is torch.Tensor
+        ):
+            # One pass over go: amax update via atomic max + scaled e5m2
+            # cast, instead of a full reduction followed by a second full
+            # read of go in to_fp8_no_autograd
+            bits_fp8_t = None
+            if go.dim() == 2:
+                # the gradX GEMM wants gradY row-major and the gradW GEMM
+                # wants its transpose, so emit both layouts from the one read
+                bits_fp8, bits_fp8_t = fused_quantize_transpose_fp8(
+                    go, fp8_scale_dL_dY, fp8_amax_dL_dY, torch.float8_e5m2
+                )
+            else:
+                bits_fp8 = fused_act_quantize_fp8(
+                    go, fp8_scale_dL_dY, fp8_amax_dL_dY, torch.float8_e5m2
+                )
+            res = Float8Tensor(
+                bits_fp8,
+                fp8_scale_dL_dY,
+                go.dtype,
+                mm_config=ctx.mm_config,
+                data_t=bits_fp8_t,
+            )
+        else:
+            fp8_amax_dL_dY.fill_(tensor_to_amax(go))
 
-        res = to_fp8_no_autograd(
-            go, fp8_scale_dL_dY, torch.float8_e5m2, mm_config=ctx.mm_config
-        )
+            res = to_fp8_no_autograd(
+                go, fp8_scale_dL_dY, torch.float8_e5m2, mm_config=ctx.mm_config
+            )
         empty_grads = None, None, None, None, None, None
         return res, *empty_grads
 
@@ -139,42 +228,22 @@ class DelayedScalingRecipe:
 
 
 class Float8LinearMixin(object):
+    # Amax scales should always be kept as float32. The buffer names are the
+    # same for every instance, so keep them as a class constant instead of a
+    # per-instance set.
+    _ALWAYS_FP32_BUFFERS = ("fp8_delayed_state",)
+
     def __init__(self, *args, **kwargs):
         delayed_scaling_recipe = kwargs.pop(
             "delayed_scaling_recipe", DelayedScalingRecipe()
         )
-        # Amax scales should always be kept as float32.
-        self.always_float32_buffers = set()
         super().__init__(*args, **kwargs)
 
         # TODO(future): have a unique recipe per buffer instead of one per
         # module, saving implementing that until we need it.
         # TODO(future): serialization for recipes
         self.recipe = delayed_scaling_recipe
-        history_len = self.recipe.history_len
-
-        # Default values for history buffers, see above TODO
-        default_x = torch.finfo(torch.float8_e4m3fn).max
-        default_w = torch.finfo(torch.float8_e4m3fn).max
-        default_dl_dy = torch.finfo(torch.float8_e5m2).max
-
-        self.register_always_float32_buffer("fp8_amax_x", torch.tensor([default_x]))
-        self.register_always_float32_buffer(
-            "fp8_amax_history_x", torch.zeros(history_len)
-        )
-        self.register_always_float32_buffer("fp8_scale_x", torch.tensor([1.0]))
-        self.register_always_float32_buffer("fp8_amax_w", torch.tensor([default_w]))
-        self.register_always_float32_buffer(
-            "fp8_amax_history_w", torch.zeros(history_len)
-        )
-        self.register_always_float32_buffer("fp8_scale_w", torch.tensor([1.0]))
-        self.register_always_float32_buffer(
-            "fp8_amax_dL_dY", torch.tensor([default_dl_dy])
-        )
-        self.register_always_float32_buffer(
-            "fp8_amax_history_dL_dY", torch.zeros(history_len)
-        )
-        self.register_always_float32_buffer("fp8_scale_dL_dY", torch.tensor([1.0]))
+        self.create_buffers()
 
         # Defines the behavior of the matmul in the forward and backward pass
         self.forward_config = ScaledMMConfig()
@@ -193,10 +262,27 @@ class Float8LinearMixin(object):
         # update function for torch.float16
         self.last_seen_input_dtype = None
 
+        # Cache of the fp8-cast weight for inference: re-quantizing a static
+        # weight on every no-grad forward is pure waste. Invalidated when the
+        # weight's version counter changes, on _apply (device/dtype moves)
+        # and on train/eval transitions.
+        self._w_fp8_cache = None
+        # The transposed fp8 weight used by the matmul, cached alongside so
+        # the hot path also skips one __torch_dispatch__ round per forward
+        self._w_fp8_t_cache = None
+        self._w_fp8_cache_version = -1
+
         # If true, this enables TP+SP style distributed comms in TP primitives
         # Note: this is not used in non-TP code.
         self.use_sequence_parallel = False
 
+        # Optional elementwise op ("relu" or "gelu") fused into the fp8 cast
+        # of the input. When set, the op that would normally run as a separate
+        # kernel right before this linear is applied inside the quantization
+        # kernel instead, removing one full HBM round trip of the activation.
+        # See `fuse_preceding_activations` in float8_linear_utils.
+        self.fused_preceding_op = None
+
         # pre_forward and post_forward are currently broken with FSDP
         # and torch.compile, this option can disable them
         # Note that when using `config.enable_pre_and_post_forward = False`,
@@ -205,32 +291,161 @@ class Float8LinearMixin(object):
         # would be initialized in every iteration.
         self.enable_pre_and_post_forward = config.enable_pre_and_post_forward
 
+        # The pre/post forward flag is constant after __init__, so bind the
+        # noop variants once here instead of re-checking the flag (and paying
+        # the attribute lookups) on every forward.
+        if self.enable_pre_and_post_forward:
+            self._pre_forward = self.float8_pre_forward
+            self._post_forward = self.float8_post_forward
+        else:
+            self._pre_forward = self._noop_pre_forward
+            self._post_forward = self._noop_post_forward
+
+        # Lazily populated torch.compile'd version of the core forward when
+        # `config.compile_inner` is set, see `Float8Linear.forward`. Built on
+        # first use so that module swapping / deepcopying stays cheap.
+        self._compiled_core = None
+
+    def create_buffers(self, device=None):
+        """(Re)creates the packed delayed scaling state with a single
+        allocation, optionally directly on `device` to avoid a CPU
+        allocation followed by a H2D copy in `from_float`."""
+        history_len = self.recipe.history_len
+
+        # Default values for history buffers, see TODO above
+        default_x = torch.finfo(torch.float8_e4m3fn).max
+        default_w = torch.finfo(torch.float8_e4m3fn).max
+        default_dl_dy = torch.finfo(torch.float8_e5m2).max
+
+        # All of the delayed scaling state (amax, amax history and scale, for
+        # each of x/w/dL_dY) lives in one contiguous fp32 buffer laid out as
+        # [amax, history..., scale] per role. The individual tensors exposed
+        # below (`fp8_amax_x` etc.) are views into it, so a single kernel (or
+        # a single _foreach_ call) can touch all of the state at once instead
+        # of 9 separate tiny tensors.
+        role_size = history_len + 2
+        # Build the defaults on CPU, where the scalar writes are cheap
+        # Python-side stores, and move the whole state in a single copy;
+        # allocating on the device first would cost one kernel launch per
+        # scalar default.
+        state = torch.zeros(3 * role_size)
+        state[0] = default_x
+        state[role_size - 1] = 1.0
+        state[role_size] = default_w
+        state[2 * role_size - 1] = 1.0
+        state[2 * role_size] = default_dl_dy
+        state[3 * role_size - 1] = 1.0
+        if device is not None:
+            state = state.to(device, non_blocking=True)
+        self.register_always_float32_buffer("fp8_delayed_state", state)
+
+    # Views into `fp8_delayed_state`, kept under the original buffer names so
+    # callers (and the amax sync loop) are unchanged.
+
+    def _fp8_state_view(self, role_idx: int, offset: int, length: int):
+        role_size = self.recipe.history_len + 2
+        return self.fp8_delayed_state.narrow(0, role_idx * role_size + offset, length)
+
+    @property
+    def fp8_amax_x(self):
+        return self._fp8_state_view(0, 0, 1)
+
+    @property
+    def fp8_amax_history_x(self):
+        return self._fp8_state_view(0, 1, self.recipe.history_len)
+
+    @property
+    def fp8_scale_x(self):
+        return self._fp8_state_view(0, 1 + self.recipe.history_len, 1)
+
+    @property
+    def fp8_amax_w(self):
+        return self._fp8_state_view(1, 0, 1)
+
+    @property
+    def fp8_amax_history_w(self):
+        return self._fp8_state_view(1, 1, self.recipe.history_len)
+
+    @property
+    def fp8_scale_w(self):
+        return self._fp8_state_view(1, 1 + self.recipe.history_len, 1)
+
+    @property
+    def fp8_amax_dL_dY(self):
+        return self._fp8_state_view(2, 0, 1)
+
+    @property
+    def fp8_amax_history_dL_dY(self):
+        return self._fp8_state_view(2, 1, self.recipe.history_len)
+
+    @property
+    def fp8_scale_dL_dY(self):
+        return self._fp8_state_view(2, 1 + self.recipe.history_len, 1)
+
     def register_always_float32_buffer(
         self, name: str, tensor: Optional[torch.Tensor], persistent: bool = True
     ) -> None:
+        assert name in self._ALWAYS_FP32_BUFFERS, name
         self.register_buffer(name=name, tensor=tensor, persistent=persistent)
-        self.always_float32_buffers.add(name)
 
     def _apply(self, fn, recurse=True):
         ret = super()._apply(fn, recurse)
+        self._invalidate_w_fp8_cache()
         self.convert_amax_buffer_to_float32()
         return ret
 
+    def train(self, mode: bool = True):
+        # The cached fp8 weight is only safe to reuse while the weight is
+        # static, drop it on train/eval transitions
+        self._invalidate_w_fp8_cache()
+        return super().train(mode)
+
+    def _invalidate_w_fp8_cache(self):
+        self._w_fp8_cache = None
+        self._w_fp8_t_cache = None
+        self._w_fp8_cache_version = -1
+
     def convert_amax_buffer_to_float32(self):
-        for key in self.always_float32_buffers:
-            if self._buffers[key] is not None:
-                self._buffers[key] = self._buffers[key].to(torch.float32)
+        # Only pay for the cast when _apply actually changed the dtype; in
+        # the common case (device move, fp32 already) this issues no kernels
+        buffers = self._buffers
+        for key in self._ALWAYS_FP32_BUFFERS:
+            buf = buffers[key]
+            if buf is not None and buf.dtype != torch.float32:
+                buffers[key] = buf.to(torch.float32)
 
     def cast_x_to_float8(
-        self, x: torch.Tensor, is_amax_initialized: bool
+        self, x: torch.Tensor, is_amax_initialized: bool, precomputed_amax=None
     ) -> torch.Tensor:
         # Duplicate the autocast logic for F.linear, so that the output
         # of our module has the right original precision
-        if torch.is_autocast_enabled():
+        if _is_autocast_enabled():
             # For now, hardcode to GPU's autocast dtype
             # if we need CPU support in the future, we can add it
-            autocast_dtype = torch.get_autocast_gpu_dtype()
-            x = x.to(autocast_dtype)
+            autocast_dtype = _get_autocast_gpu_dtype()
+            if x.dtype != autocast_dtype:
+                x = x.to(autocast_dtype)
+
+        if self.fused_preceding_op is not None:
+            if (
+                HAS_FUSED_ACT_QUANT
+                and x.is_cuda
+                and is_amax_initialized
+                and not torch.is_grad_enabled()
+            ):
+                # Single pass over x: activation + amax update + scaled cast
+                bits_fp8 = fused_act_quantize_fp8(
+                    x,
+                    self.fp8_scale_x,
+                    self.fp8_amax_x,
+                    torch.float8_e4m3fn,
+                    activation=self.fused_preceding_op,
+                )
+                return Float8Tensor(
+                    bits_fp8, self.fp8_scale_x, x.dtype, self.forward_config
+                )
+            # Fallback: run the op eagerly and take the regular cast path below
+            x = _EAGER_ACTIVATIONS[self.fused_preceding_op](x)
 
         scale_fn_name = self.recipe.scale_fn_name
         _maybe_initialize_amaxes_scales_for_float8_cast(
@@ -241,6 +456,7 @@ class Float8LinearMixin(object):
             scale_fn_name,
             torch.float8_e4m3fn,
             is_amax_initialized,
+            new_amax=precomputed_amax,
         )
         x_fp8 = Float8Tensor.to_float8(
             x,
@@ -249,11 +465,28 @@ class Float8LinearMixin(object):
             self.fp8_amax_x,
             self.forward_config,
         )
+        if (
+            torch.is_grad_enabled()
+            and isinstance(x_fp8, Float8Tensor)
+            and x_fp8.dim() == 2
+        ):
+            # backward's gradW GEMM consumes x column-major; materialize the
+            # opposite layout now (a cheap fp8 copy) so preprocess_addmm can
+            # reuse it instead of copying the bits again in the backward
+            x_fp8._data_t = x_fp8._data.t().contiguous()
         return x_fp8
 
     def cast_w_to_float8(
-        self, w: torch.Tensor, is_amax_initialized: bool
+        self, w: torch.Tensor, is_amax_initialized: bool, precomputed_amax=None
     ) -> torch.Tensor:
+        caching_ok = not torch.is_grad_enabled()
+        if (
+            caching_ok
+            and self._w_fp8_cache is not None
+            and self._w_fp8_cache_version == w._version
+        ):
+            return self._w_fp8_cache
+
         scale_fn_name = self.recipe.scale_fn_name
         _maybe_initialize_amaxes_scales_for_float8_cast(
             w,
@@ -263,6 +496,7 @@ class Float8LinearMixin(object):
             scale_fn_name,
             torch.float8_e4m3fn,
             is_amax_initialized,
+            new_amax=precomputed_amax,
         )
 
         w_fp8 = Float8Tensor.to_float8(
@@ -272,9 +506,20 @@ class Float8LinearMixin(object):
             self.fp8_amax_w,
             self.forward_config,
         )
+        if caching_ok:
+            self._w_fp8_cache = w_fp8
+            self._w_fp8_t_cache = w_fp8.t()
+            self._w_fp8_cache_version = w._version
+        elif isinstance(w_fp8, Float8Tensor):
+            # training: backward's gradX GEMM wants the weight column-major,
+            # so also keep the transposed layout of the freshly cast bits
+            w_fp8._data_t = w_fp8._data.t().contiguous()
         return w_fp8
 
     def cast_y_to_float8_in_bw(self, y: torch.Tensor) -> torch.Tensor:
+        if not torch.is_grad_enabled():
+            # no backward will run, skip the autograd.Function wrapping
+            return y
         scale_fn_name = self.recipe.scale_fn_name
         y = NoopFwToFloat8E5M2Bw.apply(
             y,
@@ -287,6 +532,12 @@ class Float8LinearMixin(object):
         )
         return y
 
+    def _noop_pre_forward(self, x):
+        pass
+
+    def _noop_post_forward(self):
+        pass
+
     def float8_pre_forward(self, x):
         if not self.enable_pre_and_post_forward:
             return
@@ -298,7 +549,11 @@ class Float8LinearMixin(object):
             raise AssertionError(
                 "amaxes and scales not synced, please call `sync_float8_amax_and_scale_history` before forward"
             )
-        self.last_seen_input_dtype = x.dtype
+        # nn.Module.__setattr__ is expensive (it walks the param/buffer
+        # dicts), so only write when the dtype actually changed; dtypes are
+        # singletons so identity compare is enough
+        if x.dtype is not self.last_seen_input_dtype:
+            self.last_seen_input_dtype = x.dtype
 
     def float8_post_forward(self):
         if not self.enable_pre_and_post_forward:
@@ -315,20 +570,72 @@ class Float8Linear(Float8LinearMixin, torch.nn.Linear):
     scales in way friendly to delayed scaling.
     """
 
-    def forward(self, x):
-        self.float8_pre_forward(x)
+    def _core_forward(self, x):
+        is_amax_initialized = self.is_amax_initialized
+
+        x_amax = w_amax = None
+        if not is_amax_initialized and dist.is_initialized():
+            # Batch the input and weight amax reductions of the init
+            # iteration into one all_reduce instead of one NCCL launch per
+            # role. The dL_dY amax is only known in backward and keeps its
+            # own reduction.
+            with torch.no_grad():
+                x_for_amax = x
+                if torch.is_autocast_enabled():
+                    # match the autocast conversion done in cast_x_to_float8
+                    x_for_amax = x.to(torch.get_autocast_gpu_dtype())
+                amaxes = torch.stack(
+                    [tensor_to_amax(x_for_amax), tensor_to_amax(self.weight)]
+                )
+                dist.all_reduce(amaxes, op=dist.ReduceOp.MAX)
+                x_amax, w_amax = amaxes[0], amaxes[1]
+
+        x_fp8 = self.cast_x_to_float8(x, is_amax_initialized, precomputed_amax=x_amax)
+        w_fp8 = self.cast_w_to_float8(
+            self.weight, is_amax_initialized, precomputed_amax=w_amax
+        )
 
-        x_fp8 = self.cast_x_to_float8(x, self.is_amax_initialized)
-        w_fp8 = self.cast_w_to_float8(self.weight, self.is_amax_initialized)
-        y = torch.matmul(x_fp8, w_fp8.t())
+        if not torch.is_grad_enabled() and self._w_fp8_t_cache is not None:
+            # populated by cast_w_to_float8 under no_grad, skips the
+            # __torch_dispatch__ round of .t() per forward
+            w_fp8_t = self._w_fp8_t_cache
+        else:
+            w_fp8_t = w_fp8.t()
+
+        bias = self.bias
+        if bias is not None and x_fp8.dim() == 2 and bias.dtype == x_fp8.dtype:
+            # 2D input with a matching-dtype bias: route through addmm so the
+            # bias add runs in the scaled_mm epilogue instead of as a separate
+            # kernel over the full output
+            y = torch.addmm(bias, x_fp8, w_fp8_t)
+            # Cast gradY to float8_e5m2 during backward
+            if torch.is_grad_enabled():
+                y = self.cast_y_to_float8_in_bw(y)
+            return y
+
+        y = torch.matmul(x_fp8, w_fp8_t)
 
         # Cast gradY to float8_e5m2 during backward
-        y = self.cast_y_to_float8_in_bw(y)
+        if torch.is_grad_enabled():
+            y = self.cast_y_to_float8_in_bw(y)
 
-        if self.bias is not None:
-            y = y + self.bias.to(y.dtype)
+        if bias is not None:
+            # avoid the cast dispatch when the dtype already matches
+            y = y + (bias if bias.dtype == y.dtype else bias.to(y.dtype))
 
-        self.float8_post_forward()
+        return y
+
+    def forward(self, x):
+        self._pre_forward(x)
+
+        if config.compile_inner:
+            if self._compiled_core is None:
+                self._compiled_core = torch.compile(self._core_forward, dynamic=True)
+            y = self._compiled_core(x)
+        else:
+            y = self._core_forward(x)
+
+        self._post_forward()
         return y
 
     @classmethod
@@ -352,6 +659,11 @@ class Float8Linear(Float8LinearMixin, torch.nn.Linear):
         new_mod.forward_config = ScaledMMConfig(emulate, True if not emulate else False)
         new_mod.backward_config = ScaledMMConfig(emulate, False)
 
+        # Recreate the packed scaling state directly on the target device:
+        # one on-device allocation instead of a CPU allocation + H2D copy
+        # inside the `to` below
+        new_mod.create_buffers(mod.weight.device)
+
         # I think its okay to send all params and buffers to device
         new_mod.to(mod.weight.device)
         return new_mod
@@ -362,17 +674,31 @@ class Float8DASWLinear(Float8LinearMixin, torch.nn.Linear):
     scales in way friendly to delayed scaling.
     """
 
+    # Cached transpose of the static fp8 weight: the weight never changes, so
+    # pay the .t() dispatch (and the column-major layout the matmul wants)
+    # once instead of per forward. Dropped on _apply like the other caches.
+    _weight_t_fp8 = None
+
+    def _get_weight_t(self):
+        if self._weight_t_fp8 is None:
+            self._weight_t_fp8 = self.weight.t()
+        return self._weight_t_fp8
+
+    def _apply(self, fn, recurse=True):
+        self._weight_t_fp8 = None
+        return super()._apply(fn, recurse)
+
     def forward(self, x):
-        self.float8_pre_forward(x)
+        self._pre_forward(x)
 
         x_fp8 = self.cast_x_to_float8(x, self.is_amax_initialized)
-        
-        y = torch.matmul(x_fp8, self.weight.t()) # matmul expects both inputs to be Float8Tensor 
+
+        y = torch.matmul(x_fp8, self._get_weight_t()) # matmul expects both inputs to be Float8Tensor
 
         if self.bias is not None:
             y = y + self.bias.to(y.dtype)
 
-        self.float8_post_forward()
+        self._post_forward()
         return y
 
     @classmethod
@@ -391,6 +717,9 @@ class Float8DASWLinear(Float8LinearMixin, torch.nn.Linear):
         new_mod.weight = mod.weight
         new_mod.bias = mod.bias
         new_mod.emulate = emulate
+        # create the scaling state on the weight's device so the cast below
+        # sees all tensors on the same device
+        new_mod.create_buffers(mod.weight.device)
         # convert weight tensor to fp8 after moving to device to avoid to_fp8 error (tensors not on the same device)
         new_mod.weight = torch.nn.Parameter(new_mod.cast_w_to_float8(mod.weight, False), requires_grad=False)
         new_mod.to(mod.weight.device)
@@ -403,6 +732,23 @@ class Float8SWLinear(torch.nn.Linear):
         self.w_inv_s = None
         self.dtype = torch.float8_e4m3fn
         self.use_triton = use_triton
+        self._weight_t = None
+
+    def _get_weight_t(self):
+        # K-major copy of the fp8 weight for the Triton matmul: the (N, K)
+        # row-major weight's .t() view is column-major, which the split-k
+        # kernel reads uncoalesced. Materialize the (K, N) row-major layout
+        # once instead of paying the strided access on every forward.
+        # Note: the torch._scaled_mm / cutlass paths want column-major B and
+        # already get it for free from the .T view, so they are unchanged.
+        if self._weight_t is None:
+            self._weight_t = self.weight.t().contiguous()
+        return self._weight_t
+
+    def _apply(self, fn, recurse=True):
+        # drop the cached layout on device/dtype moves
+        self._weight_t = None
+        return super()._apply(fn, recurse)
 
     @classmethod
     def from_float(cls, mod, emulate: bool = False):
@@ -462,7 +808,7 @@ class Float8SWLinear(torch.nn.Linear):
         # print(f"{self.w_inv_s=}")
         
         if self.use_triton and HAS_TRITON_FP8_MATMUL:
-            y = triton_matmul(x_f8, self.weight.t()) * self.w_inv_s
+            y = triton_matmul(x_f8, self._get_weight_t()) * self.w_inv_s
             if self.bias is not None:
                 y = y + self.bias
         elif USE_VLLM_CUTLASS_SCALED_MM:
@@ -507,7 +853,7 @@ class Float8DASWLinear2(Float8SWLinear):
             x_f8 = x_f8.view(-1,ishape[-1])
         
         if self.use_triton and HAS_TRITON_FP8_MATMUL:
-            y = triton_matmul(x_f8, self.weight.t()) * self.w_inv_s * x_inv_s
+            y = triton_matmul(x_f8, self._get_weight_t()) * self.w_inv_s * x_inv_s
             if self.bias is not None:
                 y = y + self.bias
         elif USE_VLLM_CUTLASS_SCALED_MM:
@@ -517,7 +863,74 @@ class Float8DASWLinear2(Float8SWLinear):
         else: # use torch scaled_mm
             y, _ = torch._scaled_mm(x_f8, self.weight.T, out_dtype=torch.float16, scale_a=x_inv_s,
                                     scale_b=self.w_inv_s, bias=self.bias, use_fast_accum=False)
-        if len(ishape) == 3:            
+        if len(ishape) == 3:
             y = y.view(ishape[0],ishape[1],-1)
-        
+
+        return y
+
+# Per-row (per-token) scaling: one scale per activation row and one per weight
+# output channel instead of a single scalar per tensor. There is no amax state
+# to track or sync, so no delayed scaling buffers and no per-step collectives.
+class Float8RowwiseSWLinear(Float8SWLinear):
+    """
+    A wrapper around a `torch.nn.Linear` module which does fp8 compute with
+    rowwise scales, computed on the fly from each row's amax.
+    """
+
+    def to_float8_rowwise(self, x):
+        finfo = torch.finfo(self.dtype)
+        # One scale per row: dtype max divided by the row's absmax
+        scale = finfo.max / x.abs().amax(dim=-1, keepdim=True).clamp(min=1e-12)
+        x_scl_sat = (x * scale).clamp(min=finfo.min, max=finfo.max)
+        return x_scl_sat.to(self.dtype), scale.float().reciprocal()
+
+    @classmethod
+    def from_float(cls, mod, emulate: bool = False):
+        """
+        Create an nn.Linear with fp8 compute from a regular nn.Linear
+
+        Args:
+            mod (torch.nn.Linear): nn.Linear to convert
+            emulate (bool): whether to emulate fp8 matmul logic in float32
+        """
+        new_mod = cls(mod.in_features, mod.out_features, bias=False)
+        new_mod.emulate = emulate
+        # weight is (N, K): one scale per output channel, stored transposed
+        # to (1, N) so it lines up with scale_b of torch._scaled_mm
+        w_f8, w_inv_s = new_mod.to_float8_rowwise(mod.weight)
+
+        new_mod.weight = torch.nn.Parameter(w_f8, requires_grad=False)
+        new_mod.w_inv_s = torch.nn.Parameter(
+            w_inv_s.t().contiguous(), requires_grad=False
+        )
+        if mod.bias is not None:
+            new_mod.bias = torch.nn.Parameter(mod.bias.to(torch.float16), requires_grad=False) # force bias to be fp16 for now
+        else:
+            new_mod.bias = None
+        new_mod.to(mod.weight.device)
+        return new_mod
+
+    def forward(self, x):
+        ishape= list(x.shape)
+        if ishape[0] == 0: # special case handling for mixtral
+            return torch.empty([ishape[0], self.weight.shape[0]], dtype=torch.float16, device=x.device)
+
+        if len(ishape) == 3:
+            x = x.view(-1,ishape[-1])
+
+        if HAS_FUSED_ACT_QUANT and x.is_cuda:
+            # single pass per row: amax reduction, scale and cast fused
+            x_f8, x_inv_s = fused_rowwise_quantize_fp8(x, self.dtype)
+        else:
+            x_f8, x_inv_s = self.to_float8_rowwise(x)
+
+        # rowwise scale_a (M, 1) and scale_b (1, N) are natively supported
+        y = torch._scaled_mm(x_f8, self.weight.T, out_dtype=torch.float16,
+                             scale_a=x_inv_s, scale_b=self.w_inv_s,
+                             bias=self.bias, use_fast_accum=False)
+        if isinstance(y, tuple): # older torch returns (out, amax)
+            y = y[0]
+        if len(ishape) == 3:
+            y = y.view(ishape[0],ishape[1],-1)
+
         return y
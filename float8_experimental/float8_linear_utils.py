@@ -5,7 +5,7 @@
 # LICENSE file in the root directory of this source tree.
 import copy
 import logging
-from enum import auto, Enum
+from enum import IntEnum
 from typing import Callable, List, Optional, Type
 
 import torch
@@ -21,13 +21,20 @@ log = logging.getLogger(__name__)
 log.addHandler(logging.NullHandler())
 
 
-class LinearType(Enum):
-    DELAYED = auto()
-    DYNAMIC = auto()
+class LinearType(IntEnum):
+    # integer-valued so the type can index the class table below directly
+    DELAYED = 0
+    DYNAMIC = 1
 
 
 REQUIRES_SYNC = {LinearType.DELAYED}
 
+# Indexed by LinearType value; built once instead of per get_float8_linear call
+LINEAR_TYPE_MAP = (
+    Float8Linear,
+    Float8DynamicLinear,
+)
+
 
 def get_float8_linear(
     linear_type: LinearType,
@@ -40,12 +47,8 @@ def get_float8_linear(
         linear_ref: The linear module to initialize from.
         emulate: Whether to emulate the fp8 matmul logic in float32.
     """
-    LINEAR_TYPE_MAP = {
-        LinearType.DELAYED: Float8Linear,
-        LinearType.DYNAMIC: Float8DynamicLinear,
-    }
-    if linear_type not in LINEAR_TYPE_MAP:
-        raise ValueError(f"linear_type must be one of {LINEAR_TYPE_MAP.keys()}")
+    if not isinstance(linear_type, LinearType):
+        raise ValueError(f"linear_type must be one of {list(LinearType)}")
     return LINEAR_TYPE_MAP[linear_type].from_float(
         copy.deepcopy(linear_ref),
         emulate=emulate,
@@ -54,7 +57,9 @@ def get_float8_linear(
 
 def linear_requires_sync(linear_type: LinearType):
     """Returns whether the given linear_type requires sync before forward."""
-    return linear_type in REQUIRES_SYNC
+    # identity test instead of a set lookup; only delayed scaling keeps
+    # amax state that needs syncing
+    return linear_type is LinearType.DELAYED
 
 
 def _update_history_stack(
@@ -156,6 +161,50 @@ def swap_linear_with_float8_linear(
     return root_module
 
 
+def _fusable_activation_name(module: nn.Module) -> Optional[str]:
+    """Returns the fused kernel's name for `module`, or None if the module
+    is not one of the variants the kernel implements.
+
+    The kernel's gelu branch is the tanh approximation, so exact (erf)
+    ``nn.GELU`` modules are left un-fused rather than silently changing
+    numerics.
+    """
+    if type(module) is nn.ReLU:
+        return "relu"
+    if type(module) is nn.GELU and module.approximate == "tanh":
+        return "gelu"
+    return None
+
+
+def fuse_preceding_activations(model: nn.Module) -> nn.Module:
+    """
+    Folds activation modules that immediately precede a ``Float8Linear``
+    inside an ``nn.Sequential`` into the linear's fp8 input cast, so the
+    activation and the quantization run as a single kernel instead of two.
+
+    The activation module is replaced with ``nn.Identity``; run this after
+    ``swap_linear_with_float8_linear``.
+
+    Args:
+        model (torch.nn.Module): Module to modify.
+    """
+    for module in model.modules():
+        if not isinstance(module, nn.Sequential):
+            continue
+        children = list(module.children())
+        for prev, cur in zip(children, children[1:]):
+            op_name = _fusable_activation_name(prev)
+            if op_name is not None and isinstance(cur, Float8Linear):
+                cur.fused_preceding_op = op_name
+                # Replace in place so the sequential's forward becomes a no-op
+                # for the fused slot
+                for name, child in module.named_children():
+                    if child is prev:
+                        setattr(module, name, nn.Identity())
+                        break
+    return model
+
+
 def get_float8_layers(model: torch.nn.Module):
     """Iterates through the model and returns all the Float8Linear layers.
     Args:
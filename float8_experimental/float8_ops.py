@@ -5,6 +5,8 @@
 # LICENSE file in the root directory of this source tree.
 from typing import Any, Dict, Tuple
 
+import float8_experimental.config as config
+
 import torch
 
 from float8_experimental.float8_python_api import addmm_float8_unwrapped
@@ -16,12 +18,36 @@ from float8_experimental.float8_tensor import (
 from float8_experimental.float8_utils import is_row_major
 from torch.utils._pytree import tree_map
 
+HAS_TRITON_FP8_GEMM = False
+try:
+    from float8_experimental.triton_fp8_gemm import fp8_gemm
+    HAS_TRITON_FP8_GEMM = True
+except:
+    pass
+
 aten = torch.ops.aten
 c10d_functional = torch.ops.c10d_functional
 _c10d_functional = torch.ops._c10d_functional
 FLOAT8_OPS_TABLE: Dict[Any, Any] = {}
 
 
+# Ops for which the `_data_t` opposite-layout cache stays valid on the output
+_DATA_T_PRESERVING_OPS = {
+    aten.t.default,
+    aten.transpose.int,
+    aten.detach.default,
+}
+
+# Ops that leave the inner dim in place, so the `_orig_inner_dim` alignment
+# padding marker stays meaningful on the output; anything that moves or
+# reshapes the inner dim drops it and exposes the physical (padded) shape
+_PAD_PRESERVING_OPS = {
+    aten.detach.default,
+    aten.clone.default,
+    aten.fill_.Scalar,
+}
+
+
 def implements(aten_ops):
     """Register aten ops to the float8 op table"""
 
@@ -49,8 +75,23 @@ def implements(aten_ops):
 )
 def float8_desugar_op(aten_op, args, kwargs=None):
     new_data = aten_op(args[0]._data, *args[1:], **kwargs)
+    if aten_op is aten.fill_.Scalar:
+        # wrote through args[0]._data in place, so the source wrapper's
+        # cached opposite layout no longer matches its values
+        args[0]._data_t = None
     return Float8Tensor(
-        new_data, args[0]._scale, args[0]._orig_dtype, args[0]._mm_config
+        new_data,
+        args[0]._scale,
+        args[0]._orig_dtype,
+        args[0]._mm_config,
+        # transposing or detaching keeps the values, so the cached opposite
+        # layout stays valid; anything reshaping the data invalidates it
+        data_t=args[0]._data_t if aten_op in _DATA_T_PRESERVING_OPS else None,
+        # the scale is carried over unchanged, so its cached reciprocal is too
+        scale_reciprocal=args[0]._scale_reciprocal,
+        orig_inner_dim=(
+            args[0]._orig_inner_dim if aten_op in _PAD_PRESERVING_OPS else None
+        ),
     )
 
 
@@ -60,7 +101,11 @@ def float8_split(aten_op, args, kwargs=None):
 
     def make_float8(data):
         return Float8Tensor(
-            data, args[0]._scale, args[0]._orig_dtype, args[0]._mm_config
+            data,
+            args[0]._scale,
+            args[0]._orig_dtype,
+            args[0]._mm_config,
+            scale_reciprocal=args[0]._scale_reciprocal,
         )
 
     out = map(make_float8, new_data_tensors)
@@ -126,9 +171,21 @@ def preprocess_addmm(a: Float8Tensor, b: Float8Tensor):
     b_data = b._data
 
     if not is_row_major(a_data.stride()):
-        a_data = a_data.contiguous()
+        # reuse the opposite-layout bits emitted at cast time if they line up
+        # (same shape means they are the row-major version of this operand)
+        a_data_t = a._data_t
+        if a_data_t is not None and a_data_t.shape == a_data.shape:
+            a_data = a_data_t
+        else:
+            a_data = a_data.contiguous()
     if is_row_major(b_data.stride()):
-        b_data = b_data.t().contiguous().t()
+        # the column-major operand is the transpose of the cached row-major
+        # opposite layout, so the copy is free when the cache is populated
+        b_data_t = b._data_t
+        if b_data_t is not None and b_data_t.shape[::-1] == tuple(b_data.shape):
+            b_data = b_data_t.t()
+        else:
+            b_data = b_data.t().contiguous().t()
     b_scale = b._scale
     return a_data, a_scale, b_data, b_scale
 
@@ -152,6 +209,35 @@ def float8_mm(aten_op, args, kwargs=None):
         return torch.ops.aten.mm_float8_emulated(
             a._data, a._scale, b._data, b._scale, output_dtype
         )[0]
+    if (
+        HAS_TRITON_FP8_GEMM
+        and a_data.is_cuda
+        and 0 < a_data.shape[0] <= config.triton_gemm_m_threshold
+    ):
+        # small-M decode shapes: the autotuned Triton GEMM beats the
+        # cuBLAS/CUTLASS kernels behind torch._scaled_mm
+        return fp8_gemm(a_data, b_data, a_scale, b_scale, output_dtype)
+    if mm_config.should_swap_ab(a_data.shape[0]):
+        # Compute (B^T A^T)^T: b_data is column-major so its transpose is a
+        # valid row-major A operand and vice versa, making the swap free.
+        # Identical numerics, but skips the M-dim padding the scaled_mm
+        # kernels pay for skinny A.
+        tensor_out, amax = addmm_float8_unwrapped(
+            b_data.t(),
+            b_scale,
+            a_data.t(),
+            a_scale,
+            output_dtype,
+            output_scale=None,
+            bias=None,
+            use_fast_accum=mm_config.use_fast_accum,
+            a_inverse_scale=b.scale_reciprocal(),
+            b_inverse_scale=a.scale_reciprocal(),
+        )
+        # restore the row-major layout mm output contracts expect (e.g. the
+        # _unsafe_view that matmul's 3d decomposition applies to the result);
+        # the copy is tiny at M <= SWAP_AB_M_THRESHOLD
+        return tensor_out.t().contiguous()
     tensor_out, amax = addmm_float8_unwrapped(
         a_data,
         a_scale,
@@ -161,6 +247,8 @@ def float8_mm(aten_op, args, kwargs=None):
         output_scale=None,
         bias=None,
         use_fast_accum=mm_config.use_fast_accum,
+        a_inverse_scale=a.scale_reciprocal(),
+        b_inverse_scale=b.scale_reciprocal(),
     )
     return tensor_out
 
@@ -195,6 +283,8 @@ def float8_addmm(aten_op, args, kwargs=None):
         output_scale=None,
         bias=bias,
         use_fast_accum=mm_config.use_fast_accum,
+        a_inverse_scale=a.scale_reciprocal(),
+        b_inverse_scale=b.scale_reciprocal(),
     )
     return tensor_out
 
@@ -219,7 +309,11 @@ def autocast_to_copy(aten_op, args, kwargs=None):
         torch.bfloat16,
     }, "Only support floating point conversion for autocast w/ Float8Tensor"
     return Float8Tensor(
-        args[0]._data, args[0]._scale, kwargs["dtype"], args[0]._mm_config
+        args[0]._data,
+        args[0]._scale,
+        kwargs["dtype"],
+        args[0]._mm_config,
+        scale_reciprocal=args[0]._scale_reciprocal,
     )
 
 
@@ -287,7 +381,14 @@ def copy_fp8(aten_op, args, kwargs=None):
 
     fp8_out = aten_op(self_data, src_data, *args[2:], **kwargs)
     if isinstance(self, Float8Tensor):
+        # the copy wrote through self._data in place, so the destination
+        # wrapper's cached opposite layout no longer matches its values
+        self._data_t = None
         return Float8Tensor(
-            fp8_out, self._scale, self._orig_dtype, self._mm_config
+            fp8_out,
+            self._scale,
+            self._orig_dtype,
+            self._mm_config,
+            orig_inner_dim=self._orig_inner_dim,
         )
     return fp8_out
\ No newline at end of file
@@ -31,14 +31,21 @@ def addmm_float8_unwrapped(
     output_scale: Optional[torch.Tensor] = None,
     bias: Optional[torch.Tensor] = None,
     use_fast_accum: bool = False,
+    a_inverse_scale: Optional[torch.Tensor] = None,
+    b_inverse_scale: Optional[torch.Tensor] = None,
 ) -> Tuple[torch.Tensor, torch.Tensor]:
     """
     This is the unwrapped version of addmm_float8, which does not take in Float8Tensors
     as inputs. This is used to standardize the logic between subclassed and non subclassed
     versions of the linear module.
+
+    Callers that already hold the inverse scales (e.g. the cached reciprocal
+    on Float8Tensor) can pass them to skip the per-call reciprocal kernels.
     """
-    a_inverse_scale = a_scale.reciprocal()
-    b_inverse_scale = b_scale.reciprocal()
+    if a_inverse_scale is None:
+        a_inverse_scale = a_scale.reciprocal()
+    if b_inverse_scale is None:
+        b_inverse_scale = b_scale.reciprocal()
     if output_dtype == torch.float32 and bias is not None:
         # Bias is not supported by _scaled_mm when output is fp32
         output, output_amax = torch._scaled_mm(
@@ -3,8 +3,11 @@
 #
 # This source code is licensed under the BSD 3-Clause license found in the
 # LICENSE file in the root directory of this source tree.
-from collections import namedtuple
-from typing import Dict, Optional
+import functools
+import os
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
 
 import torch
 
@@ -14,18 +17,95 @@ from torch.distributed._tensor import DTensor
 
 aten = torch.ops.aten
 
+HAS_FUSED_SCALE_CAST = False
+try:
+    from float8_experimental.fused_quant import fused_scale_cast_fp8
+    HAS_FUSED_SCALE_CAST = True
+except:
+    pass
+
 
-# ScaledMMConfig is a namedtuple that defines the configuration for the scaled_mm in the forward and backward pass.
+# ScaledMMConfig defines the configuration for the scaled_mm in the forward and backward pass.
 # emulate: whether to emulate the matmuls in fp32
 # use_fast_accum: whether to use the fast-accumulation option for scaled_mm
 # fp8_output: whether to output the result of the scaled_mm in fp8
-ScaledMMConfig = namedtuple(
-    "ScaledMMConfig",
-    ["emulate", "use_fast_accum", "fp8_output"],
-    defaults=[False, False, False],
-)
+# power_of_two_scale: whether to round scales down to a power of two before
+#   casting, so the rescale is exponent-only and exactly representable
+#
+# Configs are immutable and live on the matmul dispatch hot path, where they
+# get hashed (merge caches) and compared per call: the hash is precomputed
+# once at construction and `ScaledMMConfig.get` returns interned instances so
+# repeated lookups reduce to identity checks.
+@dataclass(frozen=True)
+class ScaledMMConfig:
+    emulate: bool = False
+    use_fast_accum: bool = False
+    fp8_output: bool = False
+    power_of_two_scale: bool = False
+
+    def __post_init__(self):
+        object.__setattr__(
+            self,
+            "_hash",
+            hash(
+                (
+                    self.emulate,
+                    self.use_fast_accum,
+                    self.fp8_output,
+                    self.power_of_two_scale,
+                )
+            ),
+        )
+
+    def __hash__(self):
+        return self._hash
 
+    # Below this many rows of A, running the gemm as (B^T A^T)^T avoids the
+    # M-dim padding overhead of the scaled_mm kernels and hits faster tile
+    # configs on H100
+    SWAP_AB_M_THRESHOLD = 64
 
+    def should_swap_ab(self, m: int) -> bool:
+        """Returns whether a scaled_mm with `m` rows of A should be computed
+        with the operands swapped (as the transpose of B^T @ A^T)."""
+        return 0 < m <= self.SWAP_AB_M_THRESHOLD
+
+    @classmethod
+    def get(
+        cls,
+        emulate: bool = False,
+        use_fast_accum: bool = False,
+        fp8_output: bool = False,
+        power_of_two_scale: bool = False,
+    ) -> "ScaledMMConfig":
+        """Returns the interned config for the given field values."""
+        key = (emulate, use_fast_accum, fp8_output, power_of_two_scale)
+        config = _CONFIG_INTERN.get(key)
+        if config is None:
+            config = cls(*key)
+            _CONFIG_INTERN[key] = config
+        return config
+
+
+_CONFIG_INTERN: Dict[Tuple[bool, bool, bool, bool], ScaledMMConfig] = {}
+
+# Shared all-defaults config, so constructing a default-config Float8Tensor
+# (which happens per cast and per view op) does not allocate a fresh one.
+_DEFAULT_MM_CONFIG = ScaledMMConfig.get()
+
+# Bound once at import: Float8Tensor.__new__ runs for every cast and every
+# view op dispatch, so skip the two-level attribute chain there
+_make_wrapper_subclass = torch.Tensor._make_wrapper_subclass
+
+# Populated on the first __torch_dispatch__ call; see there for why the
+# import cannot happen at module load
+_FLOAT8_OPS_TABLE = None
+
+
+# Called once per fp8 matmul with a handful of distinct config pairs over a
+# model's lifetime, so the merge reduces to a cache lookup after warmup. The
+# configs are immutable with precomputed hashes, making the lookup cheap.
+@functools.lru_cache(maxsize=None)
 def merge_mm_configs(
     a_mm_config: ScaledMMConfig, b_mm_config: ScaledMMConfig
 ) -> ScaledMMConfig:
@@ -44,22 +124,35 @@ def merge_mm_configs(
         emulate=a_mm_config.emulate,
         use_fast_accum=a_mm_config.use_fast_accum and b_mm_config.use_fast_accum,
         fp8_output=a_mm_config.fp8_output and b_mm_config.fp8_output,
+        power_of_two_scale=a_mm_config.power_of_two_scale
+        and b_mm_config.power_of_two_scale,
     )
 
 
+# Wrapper subclasses that may hold a Float8Tensor further down; anything else
+# that is not a Float8Tensor itself is by definition not casted yet
+_WRAPPER_TYPES = (DTensor, funcol.AsyncCollectiveTensor)
+
+
 def tensor_already_casted_to_fp8(tensor: torch.Tensor) -> bool:
     """
     Check if the tensor is already casted to fp8
     """
-    if isinstance(tensor, Float8Tensor):
-        return True
-    elif isinstance(tensor, DTensor):
-        # TODO: shall we stick to public API and directly use tensor.to_local() here?
-        return tensor_already_casted_to_fp8(tensor._local_tensor)
-    elif isinstance(tensor, funcol.AsyncCollectiveTensor):
-        return tensor_already_casted_to_fp8(tensor.elem)
-
-    return False
+    # iterative rather than recursive so nested wrappers like
+    # DTensor(AsyncCollectiveTensor(Float8Tensor)) do not pay one Python
+    # frame per layer
+    while True:
+        if type(tensor) is Float8Tensor:
+            # exact type identity covers the dominant cases (plain tensor /
+            # Float8Tensor) without walking the MRO three times
+            return True
+        if not isinstance(tensor, _WRAPPER_TYPES):
+            return False
+        if isinstance(tensor, DTensor):
+            # TODO: shall we stick to public API and directly use tensor.to_local() here?
+            tensor = tensor._local_tensor
+        else:
+            tensor = tensor.elem
 
 
 def to_fp8_no_autograd(
@@ -67,6 +160,7 @@ def to_fp8_no_autograd(
     x_scale: torch.Tensor,
     float8_dtype: torch.dtype,
     mm_config: Optional[ScaledMMConfig],
+    pad_to: int = 1,
 ) -> "Float8Tensor":
     """Convert a tensor to float8 without autograd
     This is used in multiple places in the codebase to convert a tensor to float8
@@ -85,31 +179,77 @@ def to_fp8_no_autograd(
         scale: the scale to use to convert the tensor
         float8_dtype: the float8 dtype to use
         mm_config: Defines the configuration for the scaled_mm
+        pad_to: if > 1, zero-pad the inner dim of the fp8 data up to the next
+            multiple, once at construction instead of per matmul. Only the fp8
+            payload is padded: the wrapper's size() keeps reporting the
+            logical (unpadded) shape, recorded in `_orig_inner_dim`. Note
+            that _scaled_mm needs both operands padded consistently.
     """
-    x_scaled = x * x_scale
-    bits_fp8 = to_fp8_saturated(x_scaled, float8_dtype)
-
-    if isinstance(bits_fp8, DTensor):
+    if mm_config is not None and mm_config.power_of_two_scale:
+        # Round the scale down to a power of two: the multiply degenerates to
+        # an exponent adjustment and the scale is exactly representable, so
+        # the rescale itself introduces no rounding error. Rounding down
+        # (not up) keeps amax * scale within the fp8 range, avoiding extra
+        # saturation. The rounded scale is what gets stored on the tensor.
+        x_scale = torch.exp2(torch.floor(torch.log2(x_scale)))
+
+    if isinstance(x, DTensor):
         assert isinstance(
-            x, DTensor
-        ), "Expected Float8 scale to be a DTensor if bits_fp8 is a DTensor"
-        bits_mesh = bits_fp8.device_mesh
-        bits_placements = bits_fp8.placements
-        local_bits = bits_fp8.to_local()
+            x_scale, DTensor
+        ), "Expected Float8 scale to be a DTensor if x is a DTensor"
+        # Pull the local shard once up front so the scale + saturate + cast
+        # runs directly on local tensors (including the fused kernel below)
+        # instead of routing each op through DTensor dispatch, then wrap the
+        # result back into a DTensor with the original mesh and placements.
+        local_x = x.to_local()
         local_scale = x_scale.to_local()
+        if (
+            HAS_FUSED_SCALE_CAST
+            and local_x.is_cuda
+            and type(local_x) in (torch.Tensor, torch.nn.Parameter)
+        ):
+            local_bits = fused_scale_cast_fp8(local_x, local_scale, float8_dtype)
+        else:
+            local_bits = to_fp8_saturated(local_x * local_scale, float8_dtype)
         inner_float8_tensor = Float8Tensor(
             local_bits, local_scale, x.dtype, mm_config=mm_config
         )
         return DTensor.from_local(
             inner_float8_tensor,
-            bits_mesh,
-            bits_placements,
+            x.device_mesh,
+            x.placements,
             run_check=False,
-            shape=bits_fp8.size(),
-            stride=bits_fp8.stride(),
+            shape=x.size(),
+            stride=x.stride(),
         )
 
-    return Float8Tensor(bits_fp8, x_scale, x.dtype, mm_config=mm_config)
+    if HAS_FUSED_SCALE_CAST and x.is_cuda and type(x) in (
+        torch.Tensor,
+        torch.nn.Parameter,
+    ):
+        # single pass over x: scale, saturate and cast in one kernel instead
+        # of materializing the scaled high precision intermediate
+        bits_fp8 = fused_scale_cast_fp8(x, x_scale, float8_dtype)
+    else:
+        x_scaled = x * x_scale
+        bits_fp8 = to_fp8_saturated(x_scaled, float8_dtype)
+
+    orig_inner_dim = None
+    if pad_to > 1:
+        pad_amount = -bits_fp8.shape[-1] % pad_to
+        if pad_amount:
+            # single-op pad of the fp8 bits; zeros dequantize to zero so the
+            # padded columns do not perturb matmul results
+            orig_inner_dim = bits_fp8.shape[-1]
+            bits_fp8 = aten.constant_pad_nd(bits_fp8, [0, pad_amount], 0.0)
+
+    return Float8Tensor(
+        bits_fp8,
+        x_scale,
+        x.dtype,
+        mm_config=mm_config,
+        orig_inner_dim=orig_inner_dim,
+    )
 
 
 @torch._dynamo.allow_in_graph
@@ -128,6 +268,7 @@ class ToFloat8ConstrFunc(torch.autograd.Function):
         float8_dtype=torch.float8_e4m3fn,
         amax_buffer: Optional[torch.Tensor] = None,
         mm_config: Optional[ScaledMMConfig] = None,
+        pad_to: int = 1,
     ):
         """Autograd enabled wrapper around to_fp8_no_autograd that will also populate the amax buffer.
         Args
@@ -136,15 +277,23 @@ class ToFloat8ConstrFunc(torch.autograd.Function):
             float8_dtype: the float8 dtype either, torch.float8_e4m3fn or torch.float8_e5m2fn
             amax_buffer: an Optional buffer buffer to store the amax value in prior to conversion
             emulate: whether to emulate the matmuls in fp32
+            pad_to: optional inner dim alignment for the fp8 data, see
+                to_fp8_no_autograd
         """
         if amax_buffer is not None:
             amax_buffer.fill_(tensor_to_amax(tensor))
 
-        return to_fp8_no_autograd(tensor, scale, float8_dtype, mm_config=mm_config)
+        ctx.orig_inner_dim = tensor.shape[-1]
+        return to_fp8_no_autograd(
+            tensor, scale, float8_dtype, mm_config=mm_config, pad_to=pad_to
+        )
 
     @staticmethod
     def backward(ctx, g):
-        return g, None, None, None, None
+        if g.shape[-1] != ctx.orig_inner_dim:
+            # drop the gradient of the alignment padding
+            g = g[..., : ctx.orig_inner_dim]
+        return g, None, None, None, None, None
 
 
 @torch._dynamo.allow_in_graph
@@ -157,7 +306,16 @@ class FromFloat8ConstrFunc(torch.autograd.Function):
 
     @staticmethod
     def forward(ctx, tensor):
-        return (tensor._data.to(tensor._orig_dtype) / tensor._scale).to(tensor._orig_dtype)
+        # Multiply by the cached 0-dim reciprocal instead of dividing
+        # elementwise, in place on the upcast copy: one pass over _data
+        # rather than an upcast, a full-size fp32 divide and a cast back,
+        # and no small scale-prep ops per dequant after the first call.
+        data = tensor._data
+        if tensor._orig_inner_dim is not None:
+            # drop the inner-dim alignment padding so the dequantized tensor
+            # matches the logical shape
+            data = data[..., : tensor._orig_inner_dim]
+        return data.to(tensor._orig_dtype).mul_(tensor.scale_reciprocal())
 
     @staticmethod
     def backward(ctx, g):
@@ -189,7 +347,18 @@ class Float8Tensor(torch.Tensor):
     _scale: torch.Tensor
     _orig_dtype: torch.dtype
     _mm_config: ScaledMMConfig
-    __slots__ = ["_data", "_scale", "_orig_dtype", "_mm_config"]
+    _data_t: Optional[torch.Tensor]
+    _scale_reciprocal: Optional[torch.Tensor]
+    _orig_inner_dim: Optional[int]
+    __slots__ = [
+        "_data",
+        "_scale",
+        "_orig_dtype",
+        "_mm_config",
+        "_data_t",
+        "_scale_reciprocal",
+        "_orig_inner_dim",
+    ]
 
     def __new__(
         cls,
@@ -197,16 +366,28 @@ class Float8Tensor(torch.Tensor):
         scale: torch.Tensor,
         orig_dtype: torch.dtype,
         mm_config: Optional[ScaledMMConfig],
+        data_t: Optional[torch.Tensor] = None,
+        scale_reciprocal: Optional[torch.Tensor] = None,
+        orig_inner_dim: Optional[int] = None,
     ):
-        assert (
-            scale.numel() == 1
-        ), "Scale should contain a single value, but got: {} elements".format(
-            scale.numel()
-        )
-
-        self = torch.Tensor._make_wrapper_subclass(
+        if __debug__:
+            # stripped entirely under python -O; the f-string also avoids a
+            # bound-method call when the assert does fire
+            assert (
+                scale.numel() == 1
+            ), f"Scale should contain a single value, but got: {scale.numel()} elements"
+
+        size = data.size()
+        if orig_inner_dim is not None and orig_inner_dim != size[-1]:
+            # `data` carries inner-dim alignment padding (see the `pad_to`
+            # argument of to_fp8_no_autograd): the wrapper reports the
+            # logical (unpadded) shape, only the fp8 payload is padded. The
+            # physical strides stay valid for the logical shape, they just
+            # describe a non-contiguous row layout.
+            size = size[:-1] + (orig_inner_dim,)
+        self = _make_wrapper_subclass(
             cls,
-            data.size(),
+            size,
             strides=data.stride(),
             storage_offset=data.storage_offset(),
             dtype=orig_dtype,
@@ -217,30 +398,77 @@ class Float8Tensor(torch.Tensor):
         self._data = data
         self._scale = scale
         self._orig_dtype = orig_dtype
-        self._mm_config = mm_config if mm_config is not None else ScaledMMConfig()
+        # configs are always truthy, so `or` short-circuits without the
+        # explicit None test
+        self._mm_config = mm_config or _DEFAULT_MM_CONFIG
+        # Optional cache of the same fp8 values in the opposite layout: a
+        # row-major materialization of `data.t()`. Cast paths that know the
+        # tensor will be re-transposed in the backward (w, x, dL_dY in
+        # Float8Linear) populate it so the mm preprocessing can pick the
+        # layout each GEMM operand slot wants instead of copying; see
+        # preprocess_addmm. Transposes keep the reference, the shape tells
+        # consumers which side of the pair they are holding. Derived state,
+        # so it is not part of __tensor_flatten__.
+        self._data_t = data_t
+        # Lazily computed cache of _scale.reciprocal(), the value every
+        # dequant and torch._scaled_mm call actually consumes; see
+        # scale_reciprocal(). Computed on first use rather than here so that
+        # view ops constructing new wrappers do not pay a kernel for it.
+        self._scale_reciprocal = scale_reciprocal
+        # Logical inner dim when `data` is alignment-padded, None otherwise
+        self._orig_inner_dim = orig_inner_dim
 
         return self
 
     def __repr__(self):
-        return f"Float8Tensor(dtype={self._data.dtype}, scale={self._scale}, mm_config={self._mm_config}\nas_orig_prec={self.to_original_precision()}"
+        # Metadata only by default: printing the dequantized values launches
+        # a full fp8 -> hp kernel plus a device sync, which loggers calling
+        # repr() should not trigger accidentally. Set FLOAT8_REPR_DEQUANT=1
+        # to get the old value-printing behavior back.
+        if os.environ.get("FLOAT8_REPR_DEQUANT") == "1":
+            return f"Float8Tensor(dtype={self._data.dtype}, scale={self._scale}, mm_config={self._mm_config}\nas_orig_prec={self.to_original_precision()}"
+        return (
+            f"Float8Tensor(shape={tuple(self.shape)}, dtype={self._data.dtype}, "
+            f"scale={self._scale.item():.3e}, mm_config={self._mm_config})"
+        )
 
     def __tensor_flatten__(self):
         ctx = {
             "_orig_dtype": self._orig_dtype,
             "_mm_config": self._mm_config,
+            "_orig_inner_dim": self._orig_inner_dim,
         }
         return ["_data", "_scale"], ctx
 
     @staticmethod
     def __tensor_unflatten__(inner_tensors: Dict, metadata, outer_size, outer_stride):
-        assert len(inner_tensors) == 2
+        if __debug__:
+            assert len(inner_tensors) == 2
+        # called in tight loops during compile re-tracing and checkpointing:
+        # hoist the dict lookups and construct positionally; Float8Tensor has
+        # no __init__, so __new__ is the entire construction path
+        data = inner_tensors["_data"]
+        scale = inner_tensors["_scale"]
         return Float8Tensor(
-            inner_tensors["_data"],
-            inner_tensors["_scale"],
+            data,
+            scale,
             metadata["_orig_dtype"],
             metadata["_mm_config"],
+            orig_inner_dim=metadata.get("_orig_inner_dim"),
         )
 
+    def scale_reciprocal(self) -> torch.Tensor:
+        """Returns `_scale.reciprocal()` as a 0-dim tensor, computing and
+        caching it on first use. This is the multiplicative fp8 -> high
+        precision factor, i.e. what dequant and `torch._scaled_mm` consume;
+        0-dim so the in-place dequant multiply treats it as a scalar without
+        a per-call reshape."""
+        inv_scale = self._scale_reciprocal
+        if inv_scale is None:
+            inv_scale = self._scale.reciprocal().reshape(())
+            self._scale_reciprocal = inv_scale
+        return inv_scale
+
     def to_original_precision(self):
         return FromFloat8ConstrFunc.apply(self)
 
@@ -252,6 +480,7 @@ class Float8Tensor(torch.Tensor):
         float8_dtype: torch.dtype,
         amax_buffer: Optional[torch.Tensor] = None,
         mm_config: Optional[ScaledMMConfig] = None,
+        pad_to: int = 1,
     ):
         """Converts a higher precision tensor to float8 in a differentiable way.
 
@@ -260,12 +489,14 @@ class Float8Tensor(torch.Tensor):
             scale: the scale to use to convert the tensor
             float8_dtype: the float8 dtype to use
             amax_buffer: a buffer to store the amax value in prior to conversion
+            pad_to: optional inner dim alignment for the fp8 data, see
+                to_fp8_no_autograd
 
         Returns:
             Float8Tensor: a float8 tensor
         """
         return ToFloat8ConstrFunc.apply(
-            tensor, scale, float8_dtype, amax_buffer, mm_config
+            tensor, scale, float8_dtype, amax_buffer, mm_config, pad_to
         )
 
     @classmethod
@@ -275,27 +506,37 @@ class Float8Tensor(torch.Tensor):
         # 2. We do need to handle a couple of ops in order for
         # TorchDynamo tracing to succeed.
 
-        # Lazy import to avoid circular dependency
-        from float8_experimental.float8_ops import FLOAT8_OPS_TABLE
+        # Lazy import on the first dispatch only (circular dependency with
+        # float8_ops), then read as a module global on the hot path
+        global _FLOAT8_OPS_TABLE
+        if _FLOAT8_OPS_TABLE is None:
+            from float8_experimental.float8_ops import FLOAT8_OPS_TABLE
+
+            _FLOAT8_OPS_TABLE = FLOAT8_OPS_TABLE
 
         # All ops in the FLOAT8_OPS_TABLE expect Float8Tensor as inputs
         # And don't support mixed tensor subclasses. This will trigger the handler for
         # the next type in the dispatch list
-        def allowed_subclasses(type):
-            return (
-                issubclass(cls, type)
-                or issubclass(torch._subclasses.fake_tensor.FakeTensor, type)
-                or issubclass(
-                    torch._subclasses.functional_tensor.FunctionalTensor, type
-                )
-            )
-
-        if not all(allowed_subclasses(t) for t in types):
-            return NotImplemented
+        for t in types:
+            if not issubclass(t, _ALLOWED_SUBCLASSES):
+                return NotImplemented
 
-        if func in FLOAT8_OPS_TABLE:
-            return FLOAT8_OPS_TABLE[func](func, args, kwargs)
+        handler = _FLOAT8_OPS_TABLE.get(func)
+        if handler is not None:
+            return handler(func, args, kwargs)
         raise NotImplementedError(f"attempting to run {func}, this is not supported")
 
     # Do not force the Float8Tensor type on the returned tensor
     __torch_function__ = torch._C._disabled_torch_function_impl
+
+
+# Subclasses __torch_dispatch__ is willing to handle: one C-level issubclass
+# against this tuple per dispatched type, instead of rebuilding a closure and
+# making three separate issubclass calls on every op. Unknown wrapper
+# subclasses still fall through to NotImplemented so the next handler in the
+# dispatch list gets a chance.
+_ALLOWED_SUBCLASSES = (
+    Float8Tensor,
+    torch._subclasses.fake_tensor.FakeTensor,
+    torch._subclasses.functional_tensor.FunctionalTensor,
+)
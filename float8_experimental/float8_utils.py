@@ -24,6 +24,11 @@ FP8_TYPES = {
     torch.float8_e5m2fnuz,
 }
 
+# Saturation maxima per fp8 dtype as Python floats, precomputed so hot paths
+# (and the Triton kernel wrappers, which inline these as constexprs) do a
+# single dict lookup instead of a torch.finfo call per cast
+FP8_MAX = {dtype: torch.finfo(dtype).max for dtype in FP8_TYPES}
+
 
 @torch.no_grad()
 def amax_to_scale(
@@ -36,10 +41,10 @@ def amax_to_scale(
         orig_dtype: The original dtype of the tensor.
     """
     scale = torch.empty_like(amax, dtype=torch.float32)
-    if float8_dtype in FP8_TYPES:
-        res = torch.finfo(float8_dtype).max / torch.clamp(amax, min=EPS)
-    else:
+    max_value = FP8_MAX.get(float8_dtype)
+    if max_value is None:
         raise ValueError(f"Unsupported float8_dtype: {float8_dtype}")
+    res = max_value / torch.clamp(amax, min=EPS)
 
     # Ensure that the scale is representable in float16,
     # this helps when amax is small. We are assuming that we don't need
@@ -124,12 +129,11 @@ def to_fp8_saturated(x: torch.Tensor, float8_dtype: torch.dtype):
         is `amax2`, where `amax1 < amax2`. This is common when using delayed
         scaling.
     """
-    if float8_dtype in FP8_TYPES:
-        max_value = torch.finfo(float8_dtype).max
-        x = x.clamp(min=-max_value, max=max_value)
-        return x.to(float8_dtype)
-    else:
+    max_value = FP8_MAX.get(float8_dtype)
+    if max_value is None:
         raise ValueError(f"Unsupported float8_dtype: {float8_dtype}")
+    x = x.clamp(min=-max_value, max=max_value)
+    return x.to(float8_dtype)
 
 
 def compute_error(x: torch.Tensor, y: torch.Tensor):
@@ -159,12 +163,11 @@ def fp8_tensor_statistics(
     Returns:
         A tuple containing the number of zeros and the number of max values.
     """
-    if float8_dtype in FP8_TYPES:
-        FP8_MAX = torch.finfo(float8_dtype).max
-    else:
+    max_value = FP8_MAX.get(float8_dtype)
+    if max_value is None:
         raise ValueError(f"Unsupported float8_dtype: {float8_dtype}")
     tensor_orig_type = tensor._data.to(dtype=tensor._orig_dtype)
-    num_max = (torch.abs(tensor_orig_type) == FP8_MAX).sum().item()
+    num_max = (torch.abs(tensor_orig_type) == max_value).sum().item()
     num_zero = (tensor_orig_type == 0).sum().item()
     return (num_zero, num_max)
 
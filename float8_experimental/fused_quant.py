@@ -0,0 +1,378 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the BSD 3-Clause license found in the
+# LICENSE file in the root directory of this source tree.
+"""
+Triton kernels that fuse an elementwise op with the float8 quantization.
+
+The regular cast path reads the high precision tensor once to compute amax
+and once more to scale and cast it, and any preceding elementwise op (relu,
+gelu, ...) adds a full extra read+write of the activation. The kernels here
+load each tile once, apply the optional elementwise op, update the amax
+buffer via an atomic max and write the saturated fp8 result, so the
+activation only makes one round trip through HBM.
+"""
+
+import torch
+import torch.distributed as dist
+
+import triton
+import triton.language as tl
+
+from float8_experimental.float8_utils import EPS, FP8_MAX
+
+# Integer codes for the elementwise ops supported inside the kernel, passed
+# as constexprs so dead branches are compiled out.
+_ACT_NONE = 0
+_ACT_RELU = 1
+_ACT_GELU = 2
+
+ACTIVATION_CODES = {
+    None: _ACT_NONE,
+    "relu": _ACT_RELU,
+    "gelu": _ACT_GELU,
+}
+
+
+@triton.jit
+def _fused_act_quantize_fp8_kernel(
+    x_ptr,
+    out_ptr,
+    scale_ptr,
+    amax_ptr,
+    n_elements,
+    fp8_max,
+    ACTIVATION: tl.constexpr,
+    BLOCK_SIZE: tl.constexpr,
+):
+    pid = tl.program_id(0)
+    offs = pid * BLOCK_SIZE + tl.arange(0, BLOCK_SIZE)
+    mask = offs < n_elements
+
+    x = tl.load(x_ptr + offs, mask=mask, other=0.0).to(tl.float32)
+    if ACTIVATION == 1:  # relu
+        x = tl.maximum(x, 0.0)
+    elif ACTIVATION == 2:  # gelu, tanh approximation
+        # tanh(v) == 2 * sigmoid(2 * v) - 1
+        inner = 0.7978845608028654 * (x + 0.044715 * x * x * x)
+        x = 0.5 * x * (2.0 * tl.sigmoid(2.0 * inner))
+
+    local_amax = tl.max(tl.abs(x), axis=0)
+    tl.atomic_max(amax_ptr, local_amax)
+
+    scale = tl.load(scale_ptr)
+    y = x * scale
+    y = tl.minimum(tl.maximum(y, -fp8_max), fp8_max)
+    tl.store(out_ptr + offs, y.to(out_ptr.dtype.element_ty), mask=mask)
+
+
+@triton.jit
+def _scale_cast_fp8_kernel(
+    x_ptr, out_ptr, scale_ptr, n_elements, fp8_max, BLOCK_SIZE: tl.constexpr
+):
+    pid = tl.program_id(0)
+    offs = pid * BLOCK_SIZE + tl.arange(0, BLOCK_SIZE)
+    mask = offs < n_elements
+    x = tl.load(x_ptr + offs, mask=mask, other=0.0).to(tl.float32)
+    y = x * tl.load(scale_ptr)
+    y = tl.minimum(tl.maximum(y, -fp8_max), fp8_max)
+    tl.store(out_ptr + offs, y.to(out_ptr.dtype.element_ty), mask=mask)
+
+
+def fused_scale_cast_fp8(
+    x: torch.Tensor, scale: torch.Tensor, float8_dtype: torch.dtype
+) -> torch.Tensor:
+    """Computes `to_fp8_saturated(x * scale, float8_dtype)` in a single
+    elementwise kernel, instead of materializing the scaled high precision
+    intermediate and reading it back for the saturation cast.
+
+    Args:
+        x: the high precision tensor to convert
+        scale: the scale to apply, fp32 scalar
+        float8_dtype: the float8 dtype to cast to
+
+    Returns:
+        the raw fp8 bits of x * scale, same shape as x
+    """
+    assert x.is_cuda, "fused_scale_cast_fp8 requires a CUDA tensor"
+    x = x.contiguous()
+    out = torch.empty_like(x, dtype=float8_dtype)
+    n_elements = x.numel()
+    grid = (triton.cdiv(n_elements, 1024),)
+    _scale_cast_fp8_kernel[grid](
+        x,
+        out,
+        scale,
+        n_elements,
+        FP8_MAX[float8_dtype],
+        BLOCK_SIZE=1024,
+    )
+    return out
+
+
+@triton.jit
+def _amax_kernel(x_ptr, amax_ptr, n_elements, BLOCK_SIZE: tl.constexpr):
+    pid = tl.program_id(0)
+    offs = pid * BLOCK_SIZE + tl.arange(0, BLOCK_SIZE)
+    mask = offs < n_elements
+    x = tl.load(x_ptr + offs, mask=mask, other=0.0).to(tl.float32)
+    local_amax = tl.max(tl.abs(x), axis=0)
+    tl.atomic_max(amax_ptr, local_amax)
+
+
+@triton.jit
+def _finalize_amax_scale_kernel(
+    amax_ptr, history_ptr, scale_ptr, fp8_max, scale_max, eps
+):
+    amax = tl.load(amax_ptr)
+    tl.store(history_ptr, amax)
+    scale = fp8_max / tl.maximum(amax, eps)
+    scale = tl.minimum(scale, scale_max)
+    tl.store(scale_ptr, scale)
+
+
+def fused_init_amaxes_scales(
+    x: torch.Tensor,
+    cur_amax: torch.Tensor,
+    amax_history: torch.Tensor,
+    scale: torch.Tensor,
+    float8_dtype: torch.dtype,
+    orig_dtype: torch.dtype,
+    reduce_amax: bool = True,
+) -> None:
+    """Initializes the delayed scaling state from `x` with two kernel
+    launches instead of four: one pass over `x` accumulates amax into
+    `cur_amax` via atomic max, then a single-program kernel writes
+    `amax_history[0]` and computes the scale inline.
+
+    Args:
+        x: the tensor about to be cast to float8
+        cur_amax: 1-element fp32 amax buffer
+        amax_history: fp32 amax history buffer, entry 0 is written
+        scale: 1-element fp32 scale buffer
+        float8_dtype: the float8 dtype the cast will use
+        orig_dtype: the high precision dtype of x, for the fp16 scale clamp
+        reduce_amax: whether to all-reduce the amax across ranks, matching
+            the eager init path
+    """
+    assert x.is_cuda, "fused_init_amaxes_scales requires a CUDA tensor"
+    x = x.contiguous()
+    cur_amax.fill_(0.0)
+    n_elements = x.numel()
+    grid = (triton.cdiv(n_elements, 1024),)
+    _amax_kernel[grid](x, cur_amax, n_elements, BLOCK_SIZE=1024)
+    # Note: we need to enable distributed reduction here in order
+    # to match numerics between single GPU and multi GPU code
+    if reduce_amax and dist.is_initialized():
+        dist.all_reduce(cur_amax, op=dist.ReduceOp.MAX)
+    # Ensure that the scale is representable in float16, matching
+    # float8_utils.amax_to_scale
+    scale_max = (
+        torch.finfo(torch.float16).max
+        if orig_dtype is torch.float16
+        else float("inf")
+    )
+    _finalize_amax_scale_kernel[(1,)](
+        cur_amax,
+        amax_history,
+        scale,
+        FP8_MAX[float8_dtype],
+        scale_max,
+        EPS,
+    )
+
+
+def fused_act_quantize_fp8(
+    x: torch.Tensor,
+    scale: torch.Tensor,
+    amax_buffer: torch.Tensor,
+    float8_dtype: torch.dtype,
+    activation=None,
+) -> torch.Tensor:
+    """Applies `activation` to `x` and casts the result to `float8_dtype`
+    in a single pass over `x`, updating `amax_buffer` with the amax of the
+    post-activation tensor.
+
+    Args:
+        x: the high precision tensor to convert
+        scale: the (precomputed, delayed scaling) scale to apply, fp32 scalar
+        amax_buffer: 1-element fp32 buffer to receive the amax of act(x)
+        float8_dtype: the float8 dtype to cast to
+        activation: one of the keys of ACTIVATION_CODES
+
+    Returns:
+        the raw fp8 bits of act(x) * scale, same shape as x
+    """
+    assert x.is_cuda, "fused_act_quantize_fp8 requires a CUDA tensor"
+    assert activation in ACTIVATION_CODES, f"unsupported activation: {activation}"
+    x = x.contiguous()
+    out = torch.empty_like(x, dtype=float8_dtype)
+    # amax is accumulated via atomic max over non-negative values, so we can
+    # start from zero
+    amax_buffer.fill_(0.0)
+    n_elements = x.numel()
+    fp8_max = FP8_MAX[float8_dtype]
+    grid = (triton.cdiv(n_elements, 1024),)
+    _fused_act_quantize_fp8_kernel[grid](
+        x,
+        out,
+        scale,
+        amax_buffer,
+        n_elements,
+        fp8_max,
+        ACTIVATION=ACTIVATION_CODES[activation],
+        BLOCK_SIZE=1024,
+    )
+    return out
+
+
+@triton.jit
+def _quantize_transpose_fp8_kernel(
+    x_ptr,
+    out_ptr,
+    out_t_ptr,
+    scale_ptr,
+    amax_ptr,
+    n_rows,
+    n_cols,
+    fp8_max,
+    BLOCK_M: tl.constexpr,
+    BLOCK_N: tl.constexpr,
+):
+    # 2d tiles so each element is read once and written twice: to the
+    # original row-major layout and, via an in-register transpose, to the
+    # pre-transposed output
+    pid_m = tl.program_id(0)
+    pid_n = tl.program_id(1)
+    offs_m = pid_m * BLOCK_M + tl.arange(0, BLOCK_M)
+    offs_n = pid_n * BLOCK_N + tl.arange(0, BLOCK_N)
+    mask = (offs_m[:, None] < n_rows) & (offs_n[None, :] < n_cols)
+
+    x = tl.load(
+        x_ptr + offs_m[:, None] * n_cols + offs_n[None, :], mask=mask, other=0.0
+    ).to(tl.float32)
+
+    local_amax = tl.max(tl.abs(x))
+    tl.atomic_max(amax_ptr, local_amax)
+
+    scale = tl.load(scale_ptr)
+    y = x * scale
+    y = tl.minimum(tl.maximum(y, -fp8_max), fp8_max)
+    y = y.to(out_ptr.dtype.element_ty)
+    tl.store(out_ptr + offs_m[:, None] * n_cols + offs_n[None, :], y, mask=mask)
+    tl.store(
+        out_t_ptr + offs_n[:, None] * n_rows + offs_m[None, :],
+        tl.trans(y),
+        mask=(offs_n[:, None] < n_cols) & (offs_m[None, :] < n_rows),
+    )
+
+
+def fused_quantize_transpose_fp8(
+    x: torch.Tensor,
+    scale: torch.Tensor,
+    amax_buffer: torch.Tensor,
+    float8_dtype: torch.dtype,
+):
+    """Casts a 2d tensor to `float8_dtype` in both layouts with one read of
+    `x`, updating `amax_buffer` with the amax of `x` along the way.
+
+    Args:
+        x: the (M, K) high precision tensor to convert
+        scale: the (precomputed, delayed scaling) scale to apply, fp32 scalar
+        amax_buffer: 1-element fp32 buffer to receive the amax of x
+        float8_dtype: the float8 dtype to cast to
+
+    Returns:
+        a tuple of the (M, K) row-major fp8 bits and the same values as a
+        (K, M) row-major tensor, for the `_data_t` cache of Float8Tensor
+    """
+    assert x.is_cuda, "fused_quantize_transpose_fp8 requires a CUDA tensor"
+    assert x.dim() == 2, "expecting a 2d tensor, flatten leading dims first"
+    x = x.contiguous()
+    n_rows, n_cols = x.shape
+    out = torch.empty_like(x, dtype=float8_dtype)
+    out_t = torch.empty((n_cols, n_rows), device=x.device, dtype=float8_dtype)
+    amax_buffer.fill_(0.0)
+    grid = (triton.cdiv(n_rows, 32), triton.cdiv(n_cols, 32))
+    _quantize_transpose_fp8_kernel[grid](
+        x,
+        out,
+        out_t,
+        scale,
+        amax_buffer,
+        n_rows,
+        n_cols,
+        FP8_MAX[float8_dtype],
+        BLOCK_M=32,
+        BLOCK_N=32,
+    )
+    return out, out_t
+
+
+@triton.jit
+def _rowwise_quantize_fp8_kernel(
+    x_ptr,
+    out_ptr,
+    inv_scale_ptr,
+    n_cols,
+    stride_row,
+    fp8_max,
+    eps,
+    BLOCK_SIZE: tl.constexpr,
+):
+    # one program per row: reduce amax along the row, then scale and cast,
+    # reading the row from HBM only once via the register-resident tiles
+    row = tl.program_id(0)
+    offs = tl.arange(0, BLOCK_SIZE)
+
+    amax = tl.zeros((BLOCK_SIZE,), dtype=tl.float32)
+    for col in range(0, n_cols, BLOCK_SIZE):
+        mask = col + offs < n_cols
+        x = tl.load(x_ptr + row * stride_row + col + offs, mask=mask, other=0.0)
+        amax = tl.maximum(amax, tl.abs(x.to(tl.float32)))
+    row_amax = tl.max(amax, axis=0)
+
+    scale = fp8_max / tl.maximum(row_amax, eps)
+    tl.store(inv_scale_ptr + row, 1.0 / scale)
+
+    for col in range(0, n_cols, BLOCK_SIZE):
+        mask = col + offs < n_cols
+        x = tl.load(x_ptr + row * stride_row + col + offs, mask=mask, other=0.0)
+        y = x.to(tl.float32) * scale
+        y = tl.minimum(tl.maximum(y, -fp8_max), fp8_max)
+        tl.store(
+            out_ptr + row * stride_row + col + offs,
+            y.to(out_ptr.dtype.element_ty),
+            mask=mask,
+        )
+
+
+def fused_rowwise_quantize_fp8(x: torch.Tensor, float8_dtype: torch.dtype):
+    """Casts a 2d tensor to `float8_dtype` with one scale per row.
+
+    Args:
+        x: the (M, K) high precision tensor to convert
+        float8_dtype: the float8 dtype to cast to
+
+    Returns:
+        a tuple of the (M, K) fp8 bits and the (M, 1) fp32 inverse scales,
+        laid out for the `scale_a` argument of torch._scaled_mm
+    """
+    assert x.is_cuda, "fused_rowwise_quantize_fp8 requires a CUDA tensor"
+    assert x.dim() == 2, "expecting a 2d tensor, flatten leading dims first"
+    x = x.contiguous()
+    n_rows, n_cols = x.shape
+    out = torch.empty_like(x, dtype=float8_dtype)
+    inv_scale = torch.empty((n_rows, 1), device=x.device, dtype=torch.float32)
+    _rowwise_quantize_fp8_kernel[(n_rows,)](
+        x,
+        out,
+        inv_scale,
+        n_cols,
+        x.stride(0),
+        FP8_MAX[float8_dtype],
+        EPS,
+        BLOCK_SIZE=1024,
+    )
+    return out, inv_scale
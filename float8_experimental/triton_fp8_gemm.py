@@ -0,0 +1,115 @@
+import torch
+import triton
+import triton.language as tl
+
+from float8_experimental.splitk_gemm_fp8 import grouped_launch
+
+# Autotuned fp8 GEMM for small-M (decode-style) shapes, where the
+# cuBLAS/CUTLASS kernels behind torch._scaled_mm leave throughput on the
+# table. Selected via config.triton_gemm_m_threshold in float8_ops.
+
+_configs = [
+    triton.Config(
+        {"block_m": 16, "block_n": 128, "block_k": 128, "group_m": 8},
+        num_warps=4, num_stages=3,
+    ),
+    triton.Config(
+        {"block_m": 32, "block_n": 128, "block_k": 128, "group_m": 8},
+        num_warps=4, num_stages=3,
+    ),
+    triton.Config(
+        {"block_m": 64, "block_n": 128, "block_k": 128, "group_m": 8},
+        num_warps=4, num_stages=4,
+    ),
+    triton.Config(
+        {"block_m": 64, "block_n": 256, "block_k": 128, "group_m": 8},
+        num_warps=8, num_stages=3,
+    ),
+    triton.Config(
+        {"block_m": 128, "block_n": 128, "block_k": 128, "group_m": 8},
+        num_warps=8, num_stages=3,
+    ),
+    triton.Config(
+        {"block_m": 128, "block_n": 128, "block_k": 256, "group_m": 8},
+        num_warps=8, num_stages=3,
+    ),
+    triton.Config(
+        {"block_m": 128, "block_n": 256, "block_k": 128, "group_m": 8},
+        num_warps=8, num_stages=3,
+    ),
+    triton.Config(
+        {"block_m": 256, "block_n": 128, "block_k": 128, "group_m": 8},
+        num_warps=8, num_stages=3,
+    ),
+]
+
+
+@triton.autotune(configs=_configs, key=["m", "n", "k"])
+@triton.jit
+def _fp8_gemm_kernel(a_ptr, b_ptr, c_ptr,
+            a_inv_scale_ptr, b_inv_scale_ptr,
+            m, n, k,
+            stride_am, stride_ak,
+            stride_bk, stride_bn,
+            stride_cm, stride_cn,
+            block_m: tl.constexpr, block_n: tl.constexpr, block_k: tl.constexpr,
+            group_m: tl.constexpr):
+
+    pid = tl.program_id(0)
+    pid_m, pid_n = grouped_launch(pid,
+                                  m, n,
+                                  block_m, block_n, group_m)
+
+    offs_m = pid_m*block_m + tl.arange(0, block_m)
+    offs_n = pid_n*block_n + tl.arange(0, block_n)
+    offs_k = tl.arange(0, block_k)
+
+    a_ptrs = a_ptr + (offs_m[:, None] * stride_am + offs_k[None, :] * stride_ak)
+    b_ptrs = b_ptr + (offs_k[:, None] * stride_bk + offs_n[None, :] * stride_bn)
+
+    acc = tl.zeros((block_m, block_n), dtype=tl.float32)
+    for k_ in range(0, tl.cdiv(k, block_k)):
+        k_remaining = k - k_ * block_k
+
+        a = tl.load(a_ptrs, mask=offs_k[None, :] < k_remaining, other=0.0)
+        b = tl.load(b_ptrs, mask=offs_k[:, None] < k_remaining, other=0.0)
+
+        acc = tl.dot(a, b, acc, out_dtype=tl.float32)
+
+        a_ptrs += block_k * stride_ak
+        b_ptrs += block_k * stride_bk
+
+    # Float8Tensor scales are multiplicative hp -> fp8, so the accumulator is
+    # rescaled by the product of the inverse scales
+    acc = acc * (tl.load(a_inv_scale_ptr) * tl.load(b_inv_scale_ptr))
+
+    c_ptrs = c_ptr + (offs_m[:, None] * stride_cm + offs_n[None, :] * stride_cn)
+    mask = (offs_m < m)[:, None] & (offs_n < n)[None, :]
+    tl.store(c_ptrs, acc.to(c_ptr.dtype.element_ty), mask=mask)
+
+
+def fp8_gemm(a, b, a_scale, b_scale, out_dtype):
+    """Computes `(a @ b) / (a_scale * b_scale)` for fp8 `a` (M, K) and
+    `b` (K, N), returning an (M, N) tensor in `out_dtype`.
+
+    `a_scale`/`b_scale` are the Float8Tensor scales (hp -> fp8 multipliers).
+    """
+    assert a.shape[1] == b.shape[0]
+    m, k = a.shape
+    _, n = b.shape
+
+    a_inv_scale = a_scale.reciprocal()
+    b_inv_scale = b_scale.reciprocal()
+
+    c = torch.empty((m, n), device=a.device, dtype=out_dtype)
+
+    grid = lambda META: (
+        triton.cdiv(m, META["block_m"]) * triton.cdiv(n, META["block_n"]),
+    )
+    _fp8_gemm_kernel[grid](a, b, c,
+                           a_inv_scale, b_inv_scale,
+                           m, n, k,
+                           a.stride(0), a.stride(1),
+                           b.stride(0), b.stride(1),
+                           c.stride(0), c.stride(1))
+    return c
@@ -4,6 +4,7 @@
 # This source code is licensed under the BSD 3-Clause license found in the
 # LICENSE file in the root directory of this source tree.
 import itertools
+import os
 import random
 import unittest
 import warnings
@@ -13,7 +14,7 @@ import pytest
 import torch
 import torch.nn as nn
 from float8_experimental.float8_dynamic_linear import Float8DynamicLinear
-from float8_experimental.float8_linear import Float8Linear
+from float8_experimental.float8_linear import Float8Linear, Float8RowwiseSWLinear
 from float8_experimental.float8_linear_utils import (
     filter_out_small_unaligned_layers,
     get_float8_linear,
@@ -81,6 +82,76 @@ class TestFloat8Tensor(unittest.TestCase):
         catted = torch.cat(splits, dim=0)
         assert bitwise_identical(fp8_a, catted)
 
+    def test_power_of_two_scale(self):
+        x = torch.randn(16, 16)
+        scale = tensor_to_scale(x, torch.float8_e4m3fn)
+        mm_config = ScaledMMConfig(False, False, False, True)
+        x_f8 = Float8Tensor.to_float8(x, scale, torch.float8_e4m3fn, None, mm_config)
+        # the stored scale is rounded down to the nearest power of two, so
+        # the mantissa is exactly 0.5 and the scale is within a factor of two
+        mantissa, _ = torch.frexp(x_f8._scale)
+        torch.testing.assert_close(
+            mantissa, torch.full_like(mantissa, 0.5), rtol=0, atol=0
+        )
+        self.assertTrue(torch.all(x_f8._scale <= scale).item())
+        self.assertTrue(torch.all(x_f8._scale > scale / 2).item())
+
+    def test_pad_to_logical_shape(self):
+        x = torch.randn(4, 10).requires_grad_()
+        grad = torch.randn(4, 10)
+        scale = tensor_to_scale(x, torch.float8_e4m3fn)
+        x_f8 = Float8Tensor.to_float8(
+            x, scale, torch.float8_e4m3fn, None, None, pad_to=16
+        )
+        # only the fp8 payload is padded; the wrapper reports the logical shape
+        self.assertEqual(tuple(x_f8.shape), (4, 10))
+        self.assertEqual(tuple(x_f8._data.shape), (4, 16))
+        self.assertEqual(x_f8._orig_inner_dim, 10)
+        # padded columns are zeros, so they dequantize away
+        self.assertTrue(torch.all(x_f8._data[:, 10:].to(torch.float32) == 0).item())
+
+        x_hp = x_f8.to_original_precision()
+        self.assertEqual(tuple(x_hp.shape), (4, 10))
+        x_hp.backward(grad)
+        torch.testing.assert_close(grad, x.grad, rtol=0, atol=0)
+
+    def test_repr_metadata_only(self):
+        x = torch.randn(4, 4)
+        scale = tensor_to_scale(x, torch.float8_e4m3fn)
+        x_f8 = Float8Tensor.to_float8(x, scale, torch.float8_e4m3fn)
+        # the default repr has metadata only, no dequantized values
+        r = repr(x_f8)
+        self.assertIn("shape=(4, 4)", r)
+        self.assertIn("mm_config=", r)
+        self.assertNotIn("as_orig_prec", r)
+        os.environ["FLOAT8_REPR_DEQUANT"] = "1"
+        try:
+            self.assertIn("as_orig_prec", repr(x_f8))
+        finally:
+            del os.environ["FLOAT8_REPR_DEQUANT"]
+
+
+class TestFloat8RowwiseSWLinear(unittest.TestCase):
+    def test_rowwise_quantize_roundtrip(self):
+        m_ref = nn.Linear(16, 32, bias=False)
+        m_fp8 = Float8RowwiseSWLinear.from_float(m_ref)
+
+        # one scale per weight output channel, stored transposed to line up
+        # with scale_b of torch._scaled_mm
+        self.assertEqual(tuple(m_fp8.w_inv_s.shape), (1, 32))
+        w_dq = m_fp8.weight.to(torch.float32) * m_fp8.w_inv_s.t()
+        w_sqnr = compute_error(m_ref.weight, w_dq)
+        self.assertGreater(w_sqnr.item(), 20.0)
+
+        x = torch.randn(8, 16)
+        x_f8, x_inv_s = m_fp8.to_float8_rowwise(x)
+        self.assertEqual(x_f8.dtype, m_fp8.dtype)
+        # one scale per activation row
+        self.assertEqual(tuple(x_inv_s.shape), (8, 1))
+        x_dq = x_f8.to(torch.float32) * x_inv_s
+        x_sqnr = compute_error(x, x_dq)
+        self.assertGreater(x_sqnr.item(), 20.0)
+
 
 class TestFloat8Linear:
     def _test_linear_impl(
@@ -267,8 +338,9 @@ class TestFloat8Linear:
         # Cast the module to dtype
         m = m.to(dtype=linear_dtype)
         if linear_requires_sync(linear_type):
-            # Check amax buffer types
+            # Check the packed buffer and the amax/history/scale views into it
             for key in [
+                "fp8_delayed_state",
                 "fp8_amax_x",
                 "fp8_amax_history_x",
                 "fp8_scale_x",
@@ -279,9 +351,10 @@ class TestFloat8Linear:
                 "fp8_amax_history_dL_dY",
                 "fp8_scale_dL_dY",
             ]:
+                value = getattr(m, key)
                 assert (
-                    m._buffers[key].dtype == torch.float32
-                ), f"{key}.dtype is {m._buffers[key].dtype}, expected torch.float32"
+                    value.dtype == torch.float32
+                ), f"{key}.dtype is {value.dtype}, expected torch.float32"
 
         # autocast off
         x = torch.randn(16, 32, device="cuda", dtype=linear_dtype)
@@ -250,7 +250,8 @@ def run(mode: str, is_fp8: bool, compile_fsdp: bool = False, fullgraph: bool = F
                     if v1.dtype == torch.bfloat16 and not emulate:
                         atol, rtol = 2e-2, 2e-2
                     else:
-                        if k == "1.fp8_amax_history_x" and not emulate:
+                        # the packed delayed state includes the x amax history
+                        if k == "1.fp8_delayed_state" and not emulate:
                             atol, rtol = 2e-2, 6e-3
                         else:
                             atol, rtol = None, None